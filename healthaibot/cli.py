@@ -9,6 +9,7 @@ import argparse
 import os
 
 from healthaibot.utils.utils import HealthBotUtils
+from healthaibot.utils.agent_utils import SUMMARY_BASE_PROMPT
 from healthaibot.graph import build_healthbot_graph
 
 
@@ -35,6 +36,23 @@ def main():
         default=0.3,
         help='Temperature for LLM'
     )
+    parser.add_argument(
+        '--summary_mode',
+        choices=['single', 'map_reduce', 'compare'],
+        default='single',
+        help='Summarization strategy: single prompt, parallel map-reduce over sources, or compare both'
+    )
+    parser.add_argument(
+        '--max_concurrency',
+        type=int,
+        default=4,
+        help='Maximum concurrent LLM requests for map-reduce summarization'
+    )
+    parser.add_argument(
+        '--no_warmup',
+        action='store_true',
+        help='Disable background model warm-up at startup (ollama only)'
+    )
     # Add more arguments as needed
     args = parser.parse_args()
 
@@ -51,11 +69,16 @@ def main():
         model_name=args.model_name,
         temperature=args.temperature,
     )
-    
-    llm = healthbot.get_llm()
 
+    # Warm-up runs in the background while the user is typing a topic
+    llm = healthbot.get_llm(warmup_prompt=None if args.no_warmup else SUMMARY_BASE_PROMPT)
 
-    graph = build_healthbot_graph(llm)
+
+    graph = build_healthbot_graph(
+        llm,
+        summary_mode=args.summary_mode,
+        max_concurrency=args.max_concurrency,
+    )
     app = graph.compile()
 
     print("Welcome to HealthBot!")
@@ -64,4 +87,9 @@ def main():
     state = app.invoke(state, config={"recursion_limit": 100})
     # If user chose to start a new topic or additional quizzes, the graph's conditional edges manage it;
     # CLI exits after first completed flow.
+    timings = state.get("timings", {}) if isinstance(state, dict) else state.timings
+    if healthbot.warmup is not None:
+        print(f"\n{healthbot.warmup.report()}")
+    if "first_summary" in timings:
+        print(f"First summary latency: {timings['first_summary']:.2f}s")
     print("\nThank you for using HealthBot. Stay healthy!")
\ No newline at end of file
@@ -3,11 +3,12 @@
 healthAiBot graph definition.
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import json
+import os
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
-from healthaibot.utils.agent_utils import GraphHelper, tavily_search_tool
+from healthaibot.utils.agent_utils import GraphHelper, tavily_search_tool, FOCUS_SEARCH_MAX_RESULTS
 from healthaibot.utils.utils import HealthBotState
 try:
     from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, ToolMessage, BaseMessage
@@ -32,15 +33,18 @@ def feedback_router(state: HealthBotState):
     else:
         return END
 
-def build_healthbot_graph(model) -> StateGraph:
+def build_healthbot_graph(model, summary_mode: str = "single", max_concurrency: int = 4) -> StateGraph:
     """
-    Build the HealthBot graph with nodes and transitions, using HealthBotState and ToolNode for Tavily search.
+    Build the HealthBot graph with nodes and transitions, using HealthBotState.
+    The Tavily search runs in the background while the user is asked for a focus, then a focus-specific
+    follow-up search is merged in before summarization.
+    summary_mode and max_concurrency are forwarded to GraphHelper to select the summarization strategy.
     """
-    helper = GraphHelper()
+    helper = GraphHelper(summary_mode=summary_mode, max_concurrency=max_concurrency)
     graph = StateGraph(HealthBotState)
 
-    # Real ToolNode usage with tavily_search_tool defined as a LangChain tool.
-    tool_node = ToolNode([tavily_search_tool])
+    # Background workers for the topic search and the focus follow-up search.
+    search_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="healthbot-search")
 
     def ensure_tool_call(state: HealthBotState) -> HealthBotState:
         """Ensure there is an AIMessage with a tool call for tavily_search_tool.
@@ -100,6 +104,42 @@ def build_healthbot_graph(model) -> StateGraph:
             }]))
         return state
 
+    def start_search(state: HealthBotState) -> HealthBotState:
+        """Submit the pending tavily_search_tool call so the search overlaps with ask_for_focus."""
+        last = state.messages[-1] if state.messages else None
+        for tc in getattr(last, 'tool_calls', None) or []:
+            if tc.get("name") != "tavily_search_tool":
+                continue
+            state.pending_searches[tc["id"]] = search_pool.submit(tavily_search_tool.invoke, tc["args"])
+            state.tool_call_events.append({
+                "event": "tool_call_started", "tool": "tavily_search_tool", "topic": state.topic
+            })
+        return state
+
+    def collect_search(state: HealthBotState) -> HealthBotState:
+        """Start the focus follow-up search, then wait for all in-flight searches and record their output."""
+        focus_future = None
+        if state.focus and os.environ.get("TAVILY_API_KEY"):
+            focus_future = search_pool.submit(tavily_search_tool.invoke, {
+                "topic": f"{state.topic} {state.focus}",
+                "max_results": FOCUS_SEARCH_MAX_RESULTS,
+            })
+        for call_id, future in state.pending_searches.items():
+            try:
+                content = future.result()
+            except Exception as e:
+                # No ToolMessage recorded; process_tool_output falls back to a direct search.
+                state.tool_call_events.append({"event": "tool_call_failed", "tool": "tavily_search_tool", "error": str(e)})
+                continue
+            state.messages.append(ToolMessage(content=str(content), name="tavily_search_tool", tool_call_id=call_id))
+        state.pending_searches = {}
+        if focus_future is not None:
+            try:
+                state.focus_search_results = str(focus_future.result())
+            except Exception as e:
+                state.tool_call_events.append({"event": "focus_search_failed", "tool": "tavily_search_tool", "error": str(e)})
+        return state
+
     def process_tool_output(state: HealthBotState) -> HealthBotState:
         """Extract last tool message content into state.search_results for downstream summarization."""
         # Search from end for a ToolMessage (LangChain) first
@@ -131,12 +171,16 @@ def build_healthbot_graph(model) -> StateGraph:
                     state.messages.append(ToolMessage(content=f"(Fallback) Search completed for {state.topic}.", name="tavily_search_tool", tool_call_id="fallback"))
             except Exception as e:
                 state.search_results = f"No search results captured and fallback failed: {e}"
+        if state.focus_search_results:
+            state.search_results = helper.merge_search_results(state.search_results, state.focus_search_results)
         return state
 
     def reset_topic_state(state: HealthBotState) -> HealthBotState:
         """Clear topic-specific fields before starting a new topic cycle."""
         state.focus = None
         state.search_results = None
+        state.focus_search_results = None
+        state.pending_searches = {}
         state.summary = None
         state.quiz_question = None
         state.quiz_answer = None
@@ -156,9 +200,10 @@ def build_healthbot_graph(model) -> StateGraph:
     graph.add_node("ask_patient", helper.ask_patient)
     graph.add_node("generate_assistant_message", helper.generate_assistant_message)
     graph.add_node("ensure_tool_call", ensure_tool_call)
-    graph.add_node("search_tavily", tool_node)
-    graph.add_node("process_tool_output", process_tool_output)
+    graph.add_node("start_search", start_search)
     graph.add_node("ask_for_focus", helper.ask_for_focus)
+    graph.add_node("collect_search", collect_search)
+    graph.add_node("process_tool_output", process_tool_output)
     graph.add_node("summarize_results", helper.summarize_results)
     graph.add_node("present_summary", helper.present_summary)
     graph.add_node("comprehension_prompt", helper.comprehension_prompt)
@@ -172,10 +217,12 @@ def build_healthbot_graph(model) -> StateGraph:
     graph.add_node("reset_topic_state", reset_topic_state)
     graph.add_edge("ask_patient", "generate_assistant_message")
     graph.add_edge("generate_assistant_message", "ensure_tool_call")
-    graph.add_edge("ensure_tool_call", "search_tavily")
-    graph.add_edge("search_tavily", "process_tool_output")
-    graph.add_edge("process_tool_output", "ask_for_focus")
-    graph.add_edge("ask_for_focus", "summarize_results")
+    # Search runs in the background while the user answers the focus prompt.
+    graph.add_edge("ensure_tool_call", "start_search")
+    graph.add_edge("start_search", "ask_for_focus")
+    graph.add_edge("ask_for_focus", "collect_search")
+    graph.add_edge("collect_search", "process_tool_output")
+    graph.add_edge("process_tool_output", "summarize_results")
     graph.add_edge("summarize_results", "present_summary")
     graph.add_edge("present_summary", "comprehension_prompt")
 
@@ -1,25 +1,72 @@
 """Utility functions for HealthBot agent operations with quiz flow enforcement."""
 
+import ast
 from datetime import datetime
+import time
 from healthaibot.utils.utils import HealthBotState
 import os
 from langchain_tavily import TavilySearch
 from langchain.tools import tool
 
 
+SUMMARY_MODES = ("single", "map_reduce", "compare")
+# Per-document cap for map-step prompts; keeps each prefill short on small local models.
+MAX_CHUNK_CHARS = 3000
+NO_RELEVANT_INFO = "NO RELEVANT INFORMATION"
+# Focus follow-up search size, and the cap on merged results (same as Tavily's default of 5).
+FOCUS_SEARCH_MAX_RESULTS = 3
+MAX_MERGED_RESULTS = 5
+
+# Static instruction prefix shared by every summary prompt (single-shot and reduce step).
+SUMMARY_BASE_PROMPT = (
+    "You are a medical information assistant. Summarize the search results for a patient.\n\n"
+    "MANDATORY FORMAT & RULES (FOLLOW EXACTLY):\n"
+    "1. Output MUST be EXACTLY 3 TO 4 paragraphs. No other number is acceptable.\n"
+    "2. Paragraphs are separated by ONE blank line (a single empty line).\n"
+    "3. Each paragraph MUST be between 3 and 5 sentences (inclusive).\n"
+    "4. Use ONLY information present in the search results. If something isn't there, do NOT invent it.\n"
+    "5. If an expected aspect is missing, explicitly state: 'The search results do not provide information about <missing aspect>'.\n"
+    "6. Do NOT include bullet lists, numbering, headings, markdown, or metadata. Plain paragraphs only.\n"
+    "7. If you cannot satisfy ALL rules with given content, write EXACTLY this sentence alone: 'The search results are insufficient to produce a compliant summary.'\n"
+    "8. Do NOT mention these instructions or justify your formatting.\n\n"
+    "QUALITY GUIDELINES:\n"
+    "- Use clear, patient-friendly language.\n"
+    "- Avoid redundancy; group related facts.\n"
+    "- Prefer concrete facts over vague generalities.\n\n"
+    "ACCEPTABLE EXAMPLE (3 paragraphs):\n"
+    "Paragraph 1: Overview sentences 1-5.\n"
+    "\nParagraph 2: Focused detail sentences 1-4.\n"
+    "\nParagraph 3: Limitations + missing info sentences 1-3.\n\n"
+    "UNACCEPTABLE EXAMPLES (DO NOT DO):\n"
+    "- A single long block (fails rule 1).\n"
+    "- 5 paragraphs (fails rule 1).\n"
+    "- Paragraphs with 1–2 sentences (fails rule 3).\n"
+    "- Bullet lists or headings (fails rule 6).\n\n"
+)
+
+
 @tool("tavily_search_tool", return_direct=True)
-def tavily_search_tool(topic: str) -> str:
-    """Search authoritative medical sources (NIH, Mayo Clinic, WebMD) for the given topic."""
+def tavily_search_tool(topic: str, max_results: int = 5) -> str:
+    """Search authoritative medical sources (NIH, Mayo Clinic, WebMD) for the given topic, returning up to max_results documents."""
     if not os.environ.get("TAVILY_API_KEY"):
         raise ValueError("Missing Tavily API key. Please export TAVILY_API_KEY before running the agent.")
-    search = TavilySearch()
+    search = TavilySearch(max_results=max_results)
     query = f"{topic} site:nih.gov OR site:mayoclinic.org OR site:webmd.com"
     return str(search.invoke(query))
 
 
 class GraphHelper:
-    def __init__(self) -> None:  # No special init needed
-        pass
+    def __init__(self, summary_mode: str = "single", max_concurrency: int = 4) -> None:
+        """
+        Parameters:
+            summary_mode: 'single' (one prompt), 'map_reduce' (per-source partials then reduce),
+                or 'compare' (run both and report latencies, keep the map-reduce summary).
+            max_concurrency: Maximum number of concurrent map requests sent to the LLM backend.
+        """
+        if summary_mode not in SUMMARY_MODES:
+            raise ValueError(f"Unsupported summary mode. Choose one of: {', '.join(SUMMARY_MODES)}.")
+        self.summary_mode = summary_mode
+        self.max_concurrency = max(1, max_concurrency)
 
     # ---------------- Core Interaction Nodes -----------------
     def ask_patient(self, state: HealthBotState) -> HealthBotState:
@@ -82,47 +129,26 @@ class GraphHelper:
                 "Set TAVILY_API_KEY and restart to generate an evidence-based summary."
             )
             return state
-        base_prompt = (
-            "You are a medical information assistant. Summarize the search results for a patient.\n\n"
-            "MANDATORY FORMAT & RULES (FOLLOW EXACTLY):\n"
-            "1. Output MUST be EXACTLY 3 TO 4 paragraphs. No other number is acceptable.\n"
-            "2. Paragraphs are separated by ONE blank line (a single empty line).\n"
-            "3. Each paragraph MUST be between 3 and 5 sentences (inclusive).\n"
-            "4. Use ONLY information present in the search results. If something isn't there, do NOT invent it.\n"
-            "5. If an expected aspect is missing, explicitly state: 'The search results do not provide information about <missing aspect>'.\n"
-            "6. Do NOT include bullet lists, numbering, headings, markdown, or metadata. Plain paragraphs only.\n"
-            "7. If you cannot satisfy ALL rules with given content, write EXACTLY this sentence alone: 'The search results are insufficient to produce a compliant summary.'\n"
-            "8. Do NOT mention these instructions or justify your formatting.\n\n"
-            "QUALITY GUIDELINES:\n"
-            "- Use clear, patient-friendly language.\n"
-            "- Avoid redundancy; group related facts.\n"
-            "- Prefer concrete facts over vague generalities.\n\n"
-            "ACCEPTABLE EXAMPLE (3 paragraphs):\n"
-            "Paragraph 1: Overview sentences 1-5.\n"
-            "\nParagraph 2: Focused detail sentences 1-4.\n"
-            "\nParagraph 3: Limitations + missing info sentences 1-3.\n\n"
-            "UNACCEPTABLE EXAMPLES (DO NOT DO):\n"
-            "- A single long block (fails rule 1).\n"
-            "- 5 paragraphs (fails rule 1).\n"
-            "- Paragraphs with 1–2 sentences (fails rule 3).\n"
-            "- Bullet lists or headings (fails rule 6).\n\n"
-        )
-        if focus:
-            base_prompt += f"FOCUS REQUIREMENT: Emphasize information about '{focus}'.\n\n"
-        base_prompt += (
-            "FORMAT: Write EXACTLY 3 TO 4 paragraphs separated by blank lines. Do not include headers, bullet points, or numbered lists.\n\n"
-            "SEARCH RESULTS TO SUMMARIZE:\n"
-        )
-        prompt = base_prompt + (state.search_results or "")
         state.messages.append({
             "role": "user", "content": f"Requesting summary generation for topic: {state.topic}",
-            "action": "summarize_results", "focus": focus if focus else "None"
+            "action": "summarize_results", "focus": focus if focus else "None",
+            "summary_mode": self.summary_mode
         })
         if llm is None:
             state.summary = "LLM not initialized."
             return state
-        summary = llm.invoke(prompt)
-        state.summary = summary.content if hasattr(summary, 'content') else str(summary)
+
+        if self.summary_mode == "single":
+            state.summary = self._timed_summary(state, "single", self._summarize_single)
+        elif self.summary_mode == "map_reduce":
+            state.summary = self._timed_summary(state, "map_reduce", self._summarize_map_reduce)
+        else:  # compare: run both on the same results, keep the map-reduce output
+            self._timed_summary(state, "single", self._summarize_single)
+            state.summary = self._timed_summary(state, "map_reduce", self._summarize_map_reduce)
+            print(
+                f"\nSummary latency - single-shot: {state.timings['summary_single']:.2f}s, "
+                f"map-reduce: {state.timings['summary_map_reduce']:.2f}s"
+            )
         state.messages.append({
             "role": "assistant",
             "content": f"Generated summary for {state.topic} ({len(state.summary)} characters)",
@@ -131,6 +157,134 @@ class GraphHelper:
         })
         return state
 
+    # ---------------- Summarization Helpers -----------------
+    def _timed_summary(self, state: HealthBotState, mode: str, summarize) -> str:
+        """Run one summarization strategy and record its wall-clock latency in state.timings."""
+        started = time.perf_counter()
+        summary = summarize(state)
+        elapsed = time.perf_counter() - started
+        state.timings[f"summary_{mode}"] = elapsed
+        state.timings.setdefault("first_summary", elapsed)
+        state.messages.append({
+            "role": "assistant", "content": f"{mode} summary took {elapsed:.2f}s",
+            "action": "summary_timing", "summary_mode": mode, "latency_seconds": f"{elapsed:.3f}"
+        })
+        return summary
+
+    def _summary_prompt(self, focus: str | None, source_label: str) -> str:
+        prompt = SUMMARY_BASE_PROMPT
+        if focus:
+            prompt += f"FOCUS REQUIREMENT: Emphasize information about '{focus}'.\n\n"
+        prompt += (
+            "FORMAT: Write EXACTLY 3 TO 4 paragraphs separated by blank lines. Do not include headers, bullet points, or numbered lists.\n\n"
+            f"{source_label}:\n"
+        )
+        return prompt
+
+    def _summarize_single(self, state: HealthBotState) -> str:
+        """Single-shot mode: the full search results go to the model in one prompt."""
+        prompt = self._summary_prompt(state.focus, "SEARCH RESULTS TO SUMMARIZE") + (state.search_results or "")
+        summary = state.llm.invoke(prompt)
+        return summary.content if hasattr(summary, 'content') else str(summary)
+
+    def _summarize_map_reduce(self, state: HealthBotState) -> str:
+        """Map-reduce mode: extract notes per source concurrently, then reduce them into the final summary."""
+        chunks = self._split_search_results(state.search_results or "")
+        if len(chunks) <= 1:
+            return self._summarize_single(state)
+        map_prompts = []
+        for chunk in chunks:
+            prompt = (
+                f"You are a medical information assistant. Extract the key facts about '{state.topic}' "
+                "from the ONE search result below.\n\n"
+                "RULES:\n"
+                "1. Write 3 to 6 short, plain sentences. No bullet lists, headings, or markdown.\n"
+                "2. Use ONLY information present in the search result. Do NOT invent anything.\n"
+                f"3. If the search result has nothing relevant, write EXACTLY: '{NO_RELEVANT_INFO}'\n\n"
+            )
+            if state.focus:
+                prompt += f"FOCUS REQUIREMENT: Prioritize information about '{state.focus}'.\n\n"
+            map_prompts.append(prompt + "SEARCH RESULT:\n" + chunk)
+        # Bounded parallelism so a local backend is not flooded with concurrent requests.
+        partials = state.llm.batch(
+            map_prompts,
+            config={"max_concurrency": self.max_concurrency},
+            return_exceptions=True,
+        )
+        notes = []
+        for partial in partials:
+            if isinstance(partial, Exception):
+                state.messages.append({
+                    "role": "assistant", "content": f"Partial summary failed: {partial}",
+                    "action": "summarize_map_error"
+                })
+                continue
+            text = (partial.content if hasattr(partial, 'content') else str(partial)).strip()
+            if text and NO_RELEVANT_INFO not in text:
+                notes.append(text)
+        if not notes:
+            return self._summarize_single(state)
+        source_notes = "\n\n".join(f"Source {i}:\n{note}" for i, note in enumerate(notes, start=1))
+        summary = state.llm.invoke(self._summary_prompt(state.focus, "SEARCH RESULT NOTES TO SUMMARIZE") + source_notes)
+        return summary.content if hasattr(summary, 'content') else str(summary)
+
+    def merge_search_results(self, primary: str, focused: str) -> str:
+        """Merge focus-specific results ahead of the general ones, dropping duplicate URLs."""
+        focused_docs = self._parse_search_results(focused)
+        if not focused_docs:
+            return primary
+        primary_docs = self._parse_search_results(primary)
+        if not primary_docs:
+            return f"{primary}\n\n{focused}" if primary else focused
+        merged, seen_urls = [], set()
+        for doc in focused_docs + primary_docs:
+            url = doc.get("url")
+            if url and url in seen_urls:
+                continue
+            seen_urls.add(url)
+            merged.append(doc)
+        # Same stringified-dict shape as tavily_search_tool output so downstream parsing still applies.
+        return str({"results": merged[:MAX_MERGED_RESULTS]})
+
+    @staticmethod
+    def _parse_search_results(search_results: str) -> list[dict]:
+        """Recover the per-document result list from the stringified Tavily response, if possible."""
+        try:
+            parsed = ast.literal_eval(search_results)
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            return []
+        if isinstance(parsed, dict):
+            parsed = parsed.get("results", [])
+        if not isinstance(parsed, list):
+            return []
+        return [item for item in parsed if isinstance(item, dict)]
+
+    def _split_search_results(self, search_results: str) -> list[str]:
+        """Split search results into one chunk per source document."""
+        documents = self._parse_search_results(search_results)
+        if documents:
+            chunks = []
+            for doc in documents:
+                content = doc.get("raw_content") or doc.get("content") or ""
+                if not content.strip():
+                    continue
+                chunks.append(
+                    f"Title: {doc.get('title', 'Unknown')}\n"
+                    f"URL: {doc.get('url', 'Unknown')}\n"
+                    f"Content: {content[:MAX_CHUNK_CHARS]}"
+                )
+            return chunks
+        # Unstructured text: group blank-line separated blocks into bounded chunks.
+        chunks, current = [], ""
+        for block in search_results.split("\n\n"):
+            if current and len(current) + len(block) > MAX_CHUNK_CHARS:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{block}" if current else block
+        if current.strip():
+            chunks.append(current)
+        return chunks
+
     def present_summary(self, state: HealthBotState) -> HealthBotState:
         print("\nHere is a summary of what you asked about:\n")
         print(state.summary)
@@ -4,8 +4,10 @@
 Utility functions for HealthBot operations.
 """
 
+import threading
+import time
 from pydantic import BaseModel, Field
-from typing import List, Optional, Any
+from typing import Dict, List, Optional, Any
 
 from langchain_openai import ChatOpenAI
 from langchain_ollama.chat_models import ChatOllama
@@ -20,6 +22,11 @@ class HealthBotState(BaseModel):
     topic: Optional[str] = None
     focus: Optional[str] = None
     search_results: Optional[str] = None
+    focus_search_results: Optional[str] = None
+    pending_searches: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="In-flight background searches keyed by tool_call_id (futures resolving to tool output)"
+    )
     summary: Optional[str] = None
     question: Optional[str] = None
     quiz_question: Optional[str] = None
@@ -32,9 +39,70 @@ class HealthBotState(BaseModel):
         default_factory=list, 
         description="Legacy tool call tracking - use messages for better traceability"
     )
+    timings: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Wall-clock latencies (seconds) of timed steps, e.g. summary_single / summary_map_reduce"
+    )
     llm: Optional[Any] = None
 
 
+# keep_alive=-1 asks Ollama to keep the model resident instead of unloading it after idle time.
+OLLAMA_KEEP_ALIVE = -1
+
+
+class ModelWarmup:
+    """
+    Background warm-up of an LLM backend.
+    Sends a single one-token request carrying the static prompt prefix so the backend is
+    reachable, the model is loaded, and the prefix is already prefilled before the first real call.
+    """
+    def __init__(
+        self,
+        llm: Any,
+        prompt: str,
+    ) -> None:
+        """
+        Parameters:
+            llm: The chat model to warm up.
+            prompt: Static prompt prefix shared by later requests.
+        """
+        self.llm = llm
+        self.prompt = prompt
+        self.elapsed: Optional[float] = None
+        self.error: Optional[Exception] = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="healthbot-warmup", daemon=True)
+
+    def start(self) -> "ModelWarmup":
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until warm-up finishes (or timeout). Returns True if it has finished."""
+        return self._done.wait(timeout)
+
+    def _run(self) -> None:
+        started = time.perf_counter()
+        try:
+            warm_llm = self.llm.model_copy(update={"num_predict": 1})
+            warm_llm.invoke(self.prompt)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.elapsed = time.perf_counter() - started
+            self._done.set()
+
+    def report(self) -> str:
+        if not self._done.is_set():
+            return "Model warm-up still running."
+        if self.error is not None:
+            return (
+                f"Model warm-up failed after {self.elapsed:.2f}s: {self.error} "
+                "(is `ollama serve` running and the model pulled?)"
+            )
+        return f"Model warm-up completed in {self.elapsed:.2f}s."
+
+
 class HealthBotUtils:
     """
     Utility functions for HealthBot operations.
@@ -55,12 +123,17 @@ class HealthBotUtils:
         self.llm_type = llm_type
         self.model_name = model_name
         self.temperature = temperature
+        self.warmup: Optional[ModelWarmup] = None
 
     def get_llm(
         self,
+        warmup_prompt: Optional[str] = None,
     ) -> ChatOpenAI | ChatOllama:
         """
         Get the LLM instance based on the specified type.
+        Parameters:
+            warmup_prompt: If given and the backend is Ollama, start a background warm-up
+                (stored in self.warmup) that loads the model and prefills this prompt prefix.
         Returns:
             An instance of ChatOpenAI or ChatOllama.
         """
@@ -70,10 +143,14 @@ class HealthBotUtils:
                 temperature=self.temperature
             )
         elif self.llm_type == "ollama":
-            return ChatOllama(
+            llm = ChatOllama(
                 model=self.model_name,
-                temperature=self.temperature
+                temperature=self.temperature,
+                keep_alive=OLLAMA_KEEP_ALIVE,
             )
+            if warmup_prompt is not None:
+                self.warmup = ModelWarmup(llm, warmup_prompt).start()
+            return llm
         else:
             raise ValueError("Unsupported LLM type. Choose 'openai' or 'ollama'.")
 